@@ -3,28 +3,134 @@ email_agents.py
 ----------------
 Automated Gmail handling using CrewAI + Groq:
 1. ReaderAgent - reads and summarizes emails.
-2. DecisionAgent - decides response type (includes "no reply needed").
-3. DraftAgent - drafts reply and saves it to Gmail Drafts.
+2. Decision - a token-capped Groq call picks the response type (includes "no reply needed").
+3. Drafting - a single direct Groq call writes the reply and saves it to Gmail Drafts.
 """
 import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
-from crewai import Agent, Task, Crew
+from crewai import Agent, Task
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_groq import ChatGroq
 from ai_latest_development.gmail_automation.gmail_client import GmailClient
+from ai_latest_development.gmail_automation.llm_cache import LLMCache
+from ai_latest_development.gmail_automation.prompts import (
+    BATCH_EXPECTED,
+    BATCH_PREAMBLE,
+    BATCH_PREFIX,
+    DECIDE_PREFIX,
+    DECIDER_PREAMBLE,
+    DRAFT_PREFIX,
+    DRAFT_TMPL,
+    DRAFTER_PREAMBLE,
+    READ_EXPECTED,
+    READER_PREAMBLE,
+    READ_PREFIX,
+    READ_TMPL,
+)
+from ai_latest_development.gmail_automation.semantic_cache import DEFAULT_THRESHOLD, SemanticCache
+from ai_latest_development.gmail_automation.triage import (
+    is_likely_no_reply,
+    normalize_decision,
+    parse_json_array,
+)
 from crewai import LLM  # ✅ correct import
-import sys
-import io
 
 load_dotenv()
 
 # -----------------------------
 # ✅ Initialize Groq LLM
 # -----------------------------
+GROQ_MODEL = "llama-3.1-8b-instant"
+MODEL_NAME = f"groq/{GROQ_MODEL}"
+
 llm = LLM(
-    model="groq/llama-3.1-8b-instant",
+    model=MODEL_NAME,
     api_key=os.getenv("GROQ_API_KEY")
 )
 
+# Drafting is a single tool-free call, so skip the Crew and talk to Groq directly.
+draft_llm = ChatGroq(
+    model=GROQ_MODEL,
+    api_key=os.getenv("GROQ_API_KEY"),
+    streaming=True,
+)
+
+# The decision is one short label, so cap decoding at a handful of tokens.
+decision_llm = ChatGroq(
+    model=GROQ_MODEL,
+    api_key=os.getenv("GROQ_API_KEY"),
+    temperature=0,
+    max_tokens=8,
+    stop=["\n"],
+)
+
+
+def report_prompt_cache(source, cached_tokens, prompt_tokens):
+    """Print how much of a prompt Groq served from its prompt cache."""
+    if cached_tokens is not None:
+        print(f"🗄️ Groq prompt cache ({source}): {cached_tokens}/{prompt_tokens or '?'} prompt tokens cached")
+
+
+def _prompt_source(messages):
+    """Name the CrewAI task a LiteLLM request belongs to, by its static preamble."""
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            if BATCH_PREAMBLE in content:
+                return "batch"
+            if READER_PREAMBLE in content:
+                return "reader"
+    return "crewai"
+
+
+def log_prompt_cache_usage(kwargs, completion_response, start_time, end_time):
+    """LiteLLM success callback (covers the CrewAI reader and batch calls)."""
+    usage = getattr(completion_response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens is None:
+        x_groq = getattr(completion_response, "x_groq", None) or {}
+        cached_tokens = (x_groq.get("usage") or {}).get("cached_tokens")
+    report_prompt_cache(
+        _prompt_source((kwargs or {}).get("messages")),
+        cached_tokens,
+        getattr(usage, "prompt_tokens", None),
+    )
+
+
+try:
+    import litellm  # CrewAI routes Groq calls through LiteLLM
+    litellm.success_callback.append(log_prompt_cache_usage)
+except ImportError:
+    pass
+
+# Exact-match cache for reader/decision/draft responses
+llm_cache = LLMCache()
+
+# Similarity cache for drafts (optional: needs sentence-transformers + faiss)
+try:
+    semantic_cache = SemanticCache(
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD))
+    )
+except ImportError as e:
+    print(f"ℹ️ Semantic cache disabled: {e}")
+    semantic_cache = None
+except Exception as e:
+    # A corrupt index/drafts file or a bad threshold must not stop the run.
+    print(f"⚠️ Semantic cache disabled, could not load it: {e}")
+    semantic_cache = None
+
+# Per-email body limit for batch triage, to keep one request within the context window
+BATCH_BODY_CHARS = 2000
+
+# Drafts streamed from Groq at once in batch mode, to stay under its rate limits
+DRAFT_CONCURRENCY = 4
+
 # -----------------------------
 # ✅ Gmail Setup
 # -----------------------------
@@ -37,7 +143,8 @@ llm = LLM(
 #    token_path=TOKEN_PATH
 #)
 gmail = GmailClient()
-gmail.authenticate()
+# Authenticate in the background; the first Gmail call waits for it.
+gmail.start_authentication()
 
 # -----------------------------
 # ✅ Define AI Agents
@@ -49,36 +156,27 @@ reader_agent = Agent(
     llm=llm,
 )
 
-decision_agent = Agent(
-    role="Response Decider",
-    goal=(
-        "Determine whether this email requires a reply. "
-        "If it does, classify the response type such as 'follow-up', 'thank you', or 'information request'. "
-        "If it does NOT require a reply (e.g., promotions, confirmations, newsletters, receipts), "
-        "simply return 'no reply needed'."
-    ),
-    backstory="A logical decision-maker that categorizes emails and determines whether a response is necessary.",
-    llm=llm,
-)
-
-draft_agent = Agent(
-    role="Email Drafter",
-    goal="Write a polite, context-aware draft reply ONLY if a reply is needed.",
-    backstory="An AI writer that crafts natural, professional responses to real emails.",
-    llm=llm,
-)
-
 # -----------------------------
 # ✅ Helper function: Fetch latest email
 # -----------------------------
 def get_latest_email():
-    """Fetch the latest email message."""
+    """
+    Fetch the latest email message. Emails that look like bulk mail are
+    returned as headers only (no "body" key).
+    """
     messages = gmail.list_messages(1)
     if not messages:
         print("📭 No new messages found.")
         return None
 
-    msg = gmail.read_message(messages[0]["id"])
+    msg_id = messages[0]["id"]
+
+    # Triage on headers first; obvious bulk mail never needs its body.
+    headers = gmail.get_headers(msg_id)
+    if headers and is_likely_no_reply(headers):
+        return headers
+
+    msg = gmail.read_message(msg_id)
 
     # Validate structure
     if not isinstance(msg, dict) or "body" not in msg:
@@ -87,6 +185,178 @@ def get_latest_email():
 
     return msg
 
+# -----------------------------
+# ✅ Helper functions: LLM calls (through the response cache)
+# -----------------------------
+def _cached(task_type, prompt, fn):
+    """Return fn()'s result, served from the LLM cache when the prompt was seen before."""
+    key = LLMCache.make_key(MODEL_NAME, task_type, prompt)
+    return llm_cache.get_or_compute(key, fn, task=task_type)
+
+
+def run_agent_task(task_type, agent, task):
+    """Execute a single agent task, reusing a cached response if available."""
+    return _cached(task_type, task.description, lambda: agent.execute_task(task))
+
+
+def decide(email_text):
+    """Classify the email with a single constrained Groq call."""
+    def classify():
+        response = decision_llm.invoke([
+            SystemMessage(content=DECIDER_PREAMBLE),
+            HumanMessage(content="EMAIL:\n" + email_text),
+        ])
+        # ChatGroq bypasses LiteLLM, so report prompt-cache usage here.
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        report_prompt_cache(
+            "decide",
+            (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+            token_usage.get("prompt_tokens"),
+        )
+        return response.content
+
+    return normalize_decision(_cached("decide", DECIDE_PREFIX + email_text, classify))
+
+
+def generate_draft(email_text, decision, on_ready=None):
+    """
+    Stream a reply draft from Groq and return its text. on_ready, if given,
+    is called with the finished draft as soon as the stream closes.
+    """
+    chunks = []
+    usage = None
+    for chunk in draft_llm.stream([
+        SystemMessage(content=DRAFTER_PREAMBLE),
+        HumanMessage(content="EMAIL:\n" + DRAFT_TMPL.substitute(body=email_text, decision=decision)),
+    ]):
+        if chunk.content:
+            chunks.append(chunk.content)
+        # Token usage arrives on the final chunk of the stream.
+        usage = getattr(chunk, "usage_metadata", None) or usage
+
+    # ChatGroq bypasses LiteLLM, so log_prompt_cache_usage never sees this call.
+    if usage:
+        report_prompt_cache(
+            "draft",
+            (usage.get("input_token_details") or {}).get("cache_read"),
+            usage.get("input_tokens"),
+        )
+
+    draft_reply = "".join(chunks).strip()
+    if on_ready and draft_reply:
+        on_ready(draft_reply)
+    return draft_reply
+
+
+def _semantic_lookup(email_text, decision, sender):
+    """Semantic-cache lookup that fails open: any error just means a miss."""
+    if not semantic_cache:
+        return None
+    try:
+        return semantic_cache.lookup(email_text, decision=decision, sender=sender)
+    except Exception as e:
+        print(f"⚠️ Semantic cache lookup failed, calling the LLM instead: {e}")
+        return None
+
+
+def _semantic_add(email_text, draft_reply, decision, sender):
+    """Store a draft in the semantic cache; failures are logged, not raised."""
+    if not semantic_cache:
+        return
+    try:
+        semantic_cache.add(email_text, draft_reply, decision=decision, sender=sender)
+    except Exception as e:
+        print(f"⚠️ Could not update the semantic cache: {e}")
+
+
+def write_draft(email_text, decision, on_ready=None, sender=None):
+    """
+    Produce a draft reply, trying the semantic and exact-match caches first.
+    on_ready is called once with the draft as soon as it is known, before
+    the caches are updated, so the caller can start saving it right away.
+    """
+    notified = False
+
+    def ready(draft_reply):
+        nonlocal notified
+        if on_ready and not notified and draft_reply and draft_reply.strip():
+            notified = True
+            on_ready(draft_reply)
+
+    draft_reply = _semantic_lookup(email_text, decision, sender)
+    if draft_reply:
+        ready(draft_reply)
+        return draft_reply
+
+    prompt = DRAFT_PREFIX + DRAFT_TMPL.substitute(body=email_text, decision=decision)
+    draft_reply = _cached(
+        "draft", prompt, lambda: generate_draft(email_text, decision, on_ready=ready)
+    )
+    ready(draft_reply)  # exact-match cache hit: the stream never ran
+
+    if draft_reply and draft_reply.strip():
+        _semantic_add(email_text, draft_reply, decision, sender)
+
+    return draft_reply
+
+
+def save_draft(email_data, draft_reply):
+    """Save a generated reply to Gmail Drafts (never sends it)."""
+    print("\n📝 Draft Reply:\n", draft_reply)
+
+    if draft_reply and isinstance(draft_reply, str) and draft_reply.strip():
+        sender = email_data.get("sender", "")
+        subject = f"Re: {email_data.get('subject', '')}"
+        gmail.create_draft(to=sender, subject=subject, body=draft_reply)
+        print("📤 Draft successfully created in Gmail!")
+    else:
+        print("⚠️ No valid draft generated.")
+
+
+def triage_batch(emails):
+    """
+    Summarize and classify many emails with a single LLM call.
+    Returns {message_id: {"summary": ..., "decision": ...}}.
+    """
+    items = [
+        {
+            "id": e["id"],
+            "from": e.get("sender", ""),
+            "subject": e.get("subject", ""),
+            "body": e.get("body", "")[:BATCH_BODY_CHARS],
+        }
+        for e in emails
+    ]
+    batch_task = Task(
+        description=BATCH_PREFIX + json.dumps(items, ensure_ascii=False),
+        agent=reader_agent,
+        expected_output=BATCH_EXPECTED,
+    )
+    # Parse before caching, so a malformed reply is never stored and replayed.
+    cached = _cached(
+        "batch",
+        batch_task.description,
+        lambda: json.dumps(parse_json_array(reader_agent.execute_task(batch_task))),
+    )
+    results = json.loads(cached)
+    return {str(r.get("id")): r for r in results if isinstance(r, dict)}
+
+
+async def _write_drafts(pending):
+    """Generate drafts for several (email, decision) pairs, a few at a time."""
+    limit = asyncio.Semaphore(DRAFT_CONCURRENCY)
+
+    async def write_limited(email_data, decision):
+        async with limit:
+            return await asyncio.to_thread(
+                write_draft, email_data["body"], decision, sender=email_data.get("sender")
+            )
+
+    return await asyncio.gather(
+        *(write_limited(e, decision) for e, decision in pending),
+        return_exceptions=True,
+    )
+
 # -----------------------------
 # ✅ Main Execution (Smart Handling)
 # -----------------------------
@@ -98,6 +368,12 @@ def run_email_automation():
         print("❌ No email data to process.")
         return
 
+    if is_likely_no_reply(email_data):
+        decision = "no reply needed"
+        print("⚖️ Decision:", decision)
+        print("ℹ️ No reply needed for this email (bulk/no-reply sender detected). Skipping LLM calls.")
+        return
+
     email_text = email_data.get("body", "").strip()
     if not email_text:
         print("⚠️ Empty email body. Skipping...")
@@ -106,38 +382,29 @@ def run_email_automation():
     print("\n📩 Processing latest email...")
 
     # --- Step 1: Reader + Decision tasks ---
+    # Static preamble first, email last, so the prompt prefix is cacheable.
     read_task = Task(
-        description=f"Summarize this email:\n\nSubject: {email_data.get('subject', '')}\nFrom: {email_data.get('sender', '')}\n\nBody:\n{email_text}",
+        description=READ_PREFIX + READ_TMPL.substitute(
+            subject=email_data.get("subject", ""),
+            sender=email_data.get("sender", ""),
+            body=email_text,
+        ),
         agent=reader_agent,
-        expected_output="A short summary of the latest email in plain English.",
-    )
-
-    decide_task = Task(
-        description=f"Based on this email content:\n\n{email_text}\n\nDecide what type of response is appropriate — e.g., 'follow-up', 'thank you', 'information request', or 'no reply needed'.",
-        agent=decision_agent,
-        expected_output="One of: follow-up, thank you, information request, or no reply needed.",
-    )
-
-    decision_crew = Crew(
-        agents=[reader_agent, decision_agent],
-        tasks=[read_task, decide_task],
+        expected_output=READ_EXPECTED,
     )
 
+    # The summary and the decision only need the raw email, so run them
+    # side by side instead of through a sequential Crew.
     try:
-        result = decision_crew.kickoff()
-        reader_summary, decision = None, None
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = {
+                pool.submit(run_agent_task, "read", reader_agent, read_task): "summary",
+                pool.submit(decide, email_text): "decision",
+            }
+            outputs = {futures[f]: f.result() for f in as_completed(futures)}
 
-        if hasattr(result, "tasks_output"):
-            for i, task_output in enumerate(result.tasks_output):
-                output_value = getattr(task_output, "output_text", None) \
-                    or getattr(task_output, "raw_output", None) \
-                    or getattr(task_output, "final_output", None) \
-                    or str(task_output)
-
-                if i == 0:
-                    reader_summary = output_value
-                elif i == 1:
-                    decision = str(output_value).lower()
+        reader_summary = outputs.get("summary")
+        decision = outputs.get("decision")
 
         print("\n📘 Reader Summary:", reader_summary)
         print("⚖️ Decision:", decision)
@@ -149,69 +416,87 @@ def run_email_automation():
         # --- Step 2: Generate Draft Reply ---
         print("\n✍️ Generating draft reply...")
 
-        draft_task = Task(
-            description=f"Using this email content:\n\n{email_text}\n\nand the decision result ({decision}), write a polite, professional email draft. DO NOT send it, just return the draft text.",
-            agent=draft_agent,
-            expected_output="A professional email draft based on the decision above.",
-        )
-
-        draft_crew = Crew(
-            agents=[draft_agent],
-            tasks=[draft_task],
-        )
-
-        buffer = io.StringIO()
-        sys_stdout = sys.stdout
-        sys.stdout = buffer
-        
-        draft_result = draft_crew.kickoff()
-        
-        sys.stdout = sys_stdout  # restore
-        streamed_output = buffer.getvalue().strip()
-        buffer.close()
-        
-        draft_reply = None
-        
-        # ✅ Try structured CrewAI outputs
-        if hasattr(draft_result, "tasks_output") and draft_result.tasks_output:
-            first_output = draft_result.tasks_output[0]
-            draft_reply = (
-                getattr(first_output, "output_text", None)
-                or getattr(first_output, "raw_output", None)
-                or getattr(first_output, "final_output", None)
+        # Save to Gmail as soon as the draft is complete, overlapping the
+        # Drafts API call with the cache updates in write_draft.
+        with ThreadPoolExecutor(max_workers=1) as saver:
+            pending_save = []
+            draft_reply = write_draft(
+                email_text,
+                decision,
+                on_ready=lambda reply: pending_save.append(saver.submit(save_draft, email_data, reply)),
+                sender=email_data.get("sender"),
             )
-        
-        # ✅ If still empty, use CrewOutput’s string representation
-        if (not draft_reply or not draft_reply.strip()):
-            try:
-                # CrewAI often returns the actual reply text via __str__
-                draft_reply = str(draft_result).strip()
-            except Exception:
-                pass
-            
-        # ✅ Fallback to streamed stdout (printed output)
-        if (not draft_reply or not draft_reply.strip()) and streamed_output:
-            draft_reply = streamed_output
-        
-        # 🧹 Final cleanup — remove any debug junk if present
-        if "Type of draft_result:" in draft_reply:
-            draft_reply = draft_reply.split("Type of draft_result:")[0].strip()
-        
-        print("\n📝 Draft Reply:\n", draft_reply)
-
-
-
-        if draft_reply and isinstance(draft_reply, str) and draft_reply.strip():
-            sender = email_data.get("sender", "")
-            subject = f"Re: {email_data.get('subject', '')}"
-            gmail.create_draft(to=sender, subject=subject, body=draft_reply)
-            print("📤 Draft successfully created in Gmail!")
-        else:
-            print("⚠️ No valid draft generated.")
+            if pending_save:
+                pending_save[0].result()
+            else:
+                save_draft(email_data, draft_reply)
 
     except Exception as e:
         print(f"❌ Error during email automation: {e}")
 
 
+def run_email_automation_batch(n=20):
+    """
+    Process the latest n emails at once: one Gmail batch fetch, one LLM
+    call to summarize/classify them all, then drafts only where needed.
+    """
+    print(f"\n🚀 Starting batch email handling at {datetime.now()}")
+
+    messages = gmail.list_messages(n)
+    if not messages:
+        print("📭 No new messages found.")
+        return
+
+    emails = gmail.batch_read_messages([m["id"] for m in messages])
+    candidates = [e for e in emails if e.get("body") and not is_likely_no_reply(e)]
+    print(f"ℹ️ Skipped {len(emails) - len(candidates)} bulk/empty email(s); {len(candidates)} left to triage.")
+    if not candidates:
+        return
+
+    try:
+        results = triage_batch(candidates)
+
+        pending = []
+        for email_data in candidates:
+            result = results.get(email_data["id"]) or {}
+            decision = normalize_decision(result.get("decision")) or ""
+
+            print(f"\n📩 {email_data.get('subject', '')}")
+            print("📘 Reader Summary:", result.get("summary"))
+            print("⚖️ Decision:", decision or None)
+
+            if decision and "no reply" not in decision:
+                pending.append((email_data, decision))
+
+        if not pending:
+            print("ℹ️ No replies needed for this batch.")
+            return
+
+        print(f"\n✍️ Generating {len(pending)} draft repl{'y' if len(pending) == 1 else 'ies'}...")
+        replies = asyncio.run(_write_drafts(pending))
+
+        # Gmail calls share one HTTP connection, so save the drafts sequentially.
+        for (email_data, _), draft_reply in zip(pending, replies):
+            if isinstance(draft_reply, Exception):
+                print(f"❌ Draft failed for '{email_data.get('subject', '')}': {draft_reply}")
+                continue
+            save_draft(email_data, draft_reply)
+
+    except Exception as e:
+        print(f"❌ Error during batch email automation: {e}")
+
+
 if __name__ == "__main__":
-    run_email_automation()
+    parser = argparse.ArgumentParser(description="Summarize, triage and draft replies to Gmail messages.")
+    parser.add_argument(
+        "--batch",
+        type=int,
+        metavar="N",
+        help="process the latest N emails in one batch instead of only the newest one",
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        run_email_automation_batch(args.batch)
+    else:
+        run_email_automation()
@@ -6,12 +6,21 @@ listing, and sending emails using OAuth 2.0.
 """
 
 import os
+import time
 import base64
+import random
+import asyncio
+import threading
+from functools import lru_cache
 from email.mime.text import MIMEText
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+from ai_latest_development.gmail_automation.message_parsing import parse_headers, parse_message
 
 
 # If modifying these scopes, delete token.json before running again.
@@ -20,6 +29,114 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.compose",
 ]
 
+# Headers needed to triage a message before fetching its body.
+TRIAGE_HEADERS = ("From", "Subject", "List-Unsubscribe", "Precedence")
+
+# Gmail allows 100 calls per batch, but 100 messages.get calls (500 quota
+# units) exceed the 250 units/user/s limit; Google recommends <= 50.
+BATCH_SIZE = 50
+
+# Rate-limit / transient errors worth retrying, and how hard to try.
+RETRY_STATUSES = {429, 500, 503}
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds, doubled on each attempt
+
+# Parallel single-message fetches when the batch endpoint fails.
+FALLBACK_CONCURRENCY = 10
+
+# Socket timeout (seconds) for Gmail API connections.
+HTTP_TIMEOUT = 30
+
+# Network-level failures (timeouts, DNS, dropped connections) that should
+# fall back to per-message fetches rather than abort the run.
+TRANSPORT_ERRORS = (OSError, httplib2.HttpLib2Error)
+
+
+def _is_retryable(error):
+    """
+    True for HTTP errors (e.g. 429 rate limits) that are worth retrying.
+    """
+    status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status) in RETRY_STATUSES
+    except (TypeError, ValueError):
+        return False
+
+
+def _backoff_delay(attempt):
+    """
+    Exponential backoff with jitter for the given retry attempt (1-based).
+    """
+    return BACKOFF_BASE * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_BASE)
+
+
+def _parse_or_none(msg_id, message):
+    """
+    parse_message() that logs and skips one malformed message instead of
+    failing the whole batch.
+    """
+    try:
+        return parse_message(message)
+    except Exception as error:
+        print(f"❌ Could not parse message {msg_id}: {error}")
+        return None
+
+
+def _load_credentials(creds_path, token_path):
+    """
+    Loads OAuth credentials from token.json, refreshing them or running the
+    browser flow when they are missing or invalid.
+    """
+    creds = None
+    if os.path.exists(token_path):
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+
+    # If there are no valid credentials available, let the user log in.
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(creds_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+        # Save the credentials for future use. Write via temp + rename: this
+        # may run on a daemon thread, and a half-written token.json would
+        # break every later run.
+        tmp_path = token_path + ".tmp"
+        with open(tmp_path, "w") as token:
+            token.write(creds.to_json())
+        os.replace(tmp_path, token_path)
+
+    return creds
+
+
+def _new_http():
+    """
+    Returns a fresh httplib2.Http with the client library's defaults (e.g.
+    308 kept out of redirect_codes for resumable uploads) and our timeout.
+    """
+    http = build_http()
+    http.timeout = HTTP_TIMEOUT
+    return http
+
+
+def _build_service(creds):
+    """
+    Builds the Gmail API client from the discovery document bundled with
+    google-api-python-client, so no discovery fetch goes over the network.
+    """
+    # No httplib2 response cache: it would write full message bodies to disk.
+    http = AuthorizedHttp(creds, http=_new_http())
+    return build("gmail", "v1", http=http, static_discovery=True)
+
+
+@lru_cache(maxsize=None)
+def _get_service(creds_path, token_path):
+    """
+    Returns (creds, service), authenticating only once per process.
+    """
+    creds = _load_credentials(creds_path, token_path)
+    return creds, _build_service(creds)
+
 
 class GmailClient:
     def __init__(self):
@@ -30,31 +147,53 @@ class GmailClient:
         self.creds_path = os.path.join(BASE_DIR, "credentials.json")
         self.token_path = os.path.join(BASE_DIR, "token.json")
 
+        self.creds = None
+        self._service = None
+        self._auth_thread = None
+        self._auth_error = None
+
     def authenticate(self):
         """
         Handles Gmail OAuth 2.0 flow and builds the Gmail API service.
+        Repeated calls in the same process reuse the cached service.
         """
-        creds = None
-        if os.path.exists(self.token_path):
-            creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
-
-        # If there are no valid credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.creds_path, SCOPES
-                )
-                creds = flow.run_local_server(port=0)
-            # Save the credentials for future use
-            with open(self.token_path, "w") as token:
-                token.write(creds.to_json())
-
-        self.creds = creds
-        self.service = build("gmail", "v1", credentials=creds)
+        self.creds, self._service = _get_service(self.creds_path, self.token_path)
         print("✅ Gmail authentication successful!")
 
+    def start_authentication(self):
+        """
+        Starts authenticate() in a background thread so the token refresh
+        and client build overlap with other start-up work. The first Gmail
+        call waits for it to finish.
+        """
+        if self._service is not None or self._auth_thread is not None:
+            return
+        self._auth_thread = threading.Thread(target=self._authenticate_in_background, daemon=True)
+        self._auth_thread.start()
+
+    def _authenticate_in_background(self):
+        try:
+            self.authenticate()
+        except Exception as error:  # re-raised on first use of self.service
+            self._auth_error = error
+
+    @property
+    def service(self):
+        """
+        The Gmail API service, authenticating (or waiting for the
+        background authentication) on first use.
+        """
+        if self._service is None:
+            if self._auth_thread is not None:
+                self._auth_thread.join()
+                self._auth_thread = None
+                if self._auth_error is not None:
+                    error, self._auth_error = self._auth_error, None
+                    raise error
+            if self._service is None:
+                self.authenticate()
+        return self._service
+
     def list_messages(self, max_results=5):
         """
         Lists latest Gmail messages.
@@ -70,60 +209,127 @@ class GmailClient:
         return messages
 
     def read_message(self, msg_id):
+        """
+        Fetches a single message and returns its sender, subject and body.
+        """
         from googleapiclient.errors import HttpError
-        import base64
-        from bs4 import BeautifulSoup
     
         try:
             message = self.service.users().messages().get(userId="me", id=msg_id, format="full").execute()
-            payload = message.get("payload", {})
-            headers = payload.get("headers", [])
-    
-            # Extract sender and subject
-            sender = next((h["value"] for h in headers if h["name"] == "From"), "Unknown")
-            subject = next((h["value"] for h in headers if h["name"] == "Subject"), "No Subject")
-    
-            # Decode the message body (supports multipart emails)
-            body = ""
-            body_html = ""
-    
-            def extract_parts(parts):
-                nonlocal body, body_html
-                for part in parts:
-                    mime_type = part.get("mimeType", "")
-                    data = part.get("body", {}).get("data")
-                    if data:
-                        decoded = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-                        if mime_type == "text/plain":
-                            body += decoded
-                        elif mime_type == "text/html":
-                            body_html += decoded
-                    if "parts" in part:
-                        extract_parts(part["parts"])
-    
-            if "parts" in payload:
-                extract_parts(payload["parts"])
-            else:
-                data = payload.get("body", {}).get("data")
-                if data:
-                    body = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-    
-            # If plain text is empty, extract text from HTML
-            if not body and body_html:
-                soup = BeautifulSoup(body_html, "html.parser")
-                body = soup.get_text(separator="\n")
-    
-            return {
-                "sender": sender,
-                "subject": subject,
-                "body": body.strip(),
-                "body_html": body_html.strip(),
-            }
+            return parse_message(message)
     
         except HttpError as error:
             print(f"❌ An error occurred: {error}")
             return None
 
+    def get_headers(self, msg_id, names=TRIAGE_HEADERS):
+        """
+        Fetches only the given headers of a message (format="metadata"),
+        which is enough to triage it without downloading the body.
+        """
+        from googleapiclient.errors import HttpError
+
+        try:
+            message = (
+                self.service.users()
+                .messages()
+                .get(userId="me", id=msg_id, format="metadata", metadataHeaders=list(names))
+                .execute()
+            )
+            return parse_headers(message.get("payload", {}).get("headers", []))
+
+        except HttpError as error:
+            print(f"❌ An error occurred: {error}")
+            return None
+
+    def batch_read_messages(self, msg_ids):
+        """
+        Fetches several messages using Gmail's batch endpoint, so up to
+        BATCH_SIZE message bodies come back in a single HTTP round trip.
+        Rate-limited items are retried with backoff. Returns the parsed
+        messages in the same order as msg_ids.
+        """
+        from googleapiclient.errors import HttpError
+
+        msg_ids = list(msg_ids)
+        results = {}
+        fallback = []
+
+        for start in range(0, len(msg_ids), BATCH_SIZE):
+            pending = msg_ids[start:start + BATCH_SIZE]
+            attempt = 0
+            while pending:
+                retry = []
+
+                def callback(request_id, response, exception):
+                    if exception is None:
+                        results[request_id] = _parse_or_none(request_id, response)
+                    elif _is_retryable(exception):
+                        retry.append(request_id)
+                    else:
+                        print(f"❌ Could not fetch message {request_id}: {exception}")
+
+                batch = self.service.new_batch_http_request(callback=callback)
+                for msg_id in pending:
+                    batch.add(
+                        self.service.users().messages().get(userId="me", id=msg_id, format="full"),
+                        request_id=msg_id,
+                    )
+                try:
+                    batch.execute()
+                except (HttpError, *TRANSPORT_ERRORS) as error:
+                    print(f"⚠️ Batch request failed ({error}), fetching messages individually...")
+                    fallback.extend(m for m in pending if m not in results)
+                    break
+
+                pending = retry
+                attempt += 1
+                if pending and attempt > MAX_RETRIES:
+                    print(f"⚠️ {len(pending)} message(s) still rate-limited, fetching them individually...")
+                    fallback.extend(pending)
+                    break
+                if pending:
+                    time.sleep(_backoff_delay(attempt))
+
+        if fallback:
+            results.update(asyncio.run(self._gather_messages(fallback)))
+
+        missing = sum(1 for m in msg_ids if results.get(m) is None)
+        if missing:
+            print(f"⚠️ {missing} of {len(msg_ids)} message(s) could not be fetched.")
+        return [results[m] for m in msg_ids if results.get(m) is not None]
+
+    async def _gather_messages(self, msg_ids):
+        """
+        Fallback for batch_read_messages: fetches each message with its own
+        .get() call, a few at a time, retrying rate-limit errors with backoff.
+        """
+        from googleapiclient.errors import HttpError
+
+        def fetch(msg_id):
+            # httplib2.Http is not thread-safe, so every worker gets its own.
+            http = AuthorizedHttp(self.creds, http=_new_http())
+            try:
+                message = (
+                    self.service.users()
+                    .messages()
+                    .get(userId="me", id=msg_id, format="full")
+                    .execute(http=http, num_retries=MAX_RETRIES)
+                )
+            except (HttpError, *TRANSPORT_ERRORS) as error:
+                print(f"❌ Could not fetch message {msg_id}: {error}")
+                return msg_id, None
+            return msg_id, _parse_or_none(msg_id, message)
+
+        # Bounded concurrency keeps us under the per-user quota (5 units per get).
+        limit = asyncio.Semaphore(FALLBACK_CONCURRENCY)
+
+        async def fetch_limited(msg_id):
+            async with limit:
+                return await asyncio.to_thread(fetch, msg_id)
+
+        pairs = await asyncio.gather(*(fetch_limited(m) for m in msg_ids))
+        return dict(pairs)
 
     def create_draft(self, to, subject, body):
         """
@@ -147,17 +353,10 @@ class GmailClient:
 
 
 if __name__ == "__main__":
-    # Dynamically find the directory of this script
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
-    TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
-
-    gmail = GmailClient(
-        credentials_path=CREDENTIALS_PATH,
-        token_path=TOKEN_PATH
-    )
+    # credentials.json / token.json are resolved next to this script
+    gmail = GmailClient()
 
     gmail.authenticate()
     messages = gmail.list_messages(3)
     if messages:
-        gmail.read_message(messages[0]["id"])
\ No newline at end of file
+        gmail.batch_read_messages([m["id"] for m in messages])
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+llm_cache.py
+----------------
+Persistent exact-match cache for LLM responses, backed by SQLite.
+Identical prompts (e.g. templated vendor mail arriving twice) are served
+from disk instead of calling the model again.
+"""
+
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+
+from ai_latest_development.gmail_automation.paths import cache_path
+
+
+DEFAULT_CACHE_FILE = "llm_cache.sqlite3"
+
+# Entries older than this are ignored and recomputed.
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+class LLMCache:
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        """
+        Initialize the cache, create the table if needed and drop expired rows.
+        Defaults to a file in the user cache directory (see paths.py).
+        """
+        self.path = path or cache_path(DEFAULT_CACHE_FILE)
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "hash TEXT PRIMARY KEY, task TEXT, response TEXT, ts INTEGER)"
+            )
+        self.prune()
+
+    def prune(self):
+        """
+        Deletes entries older than the TTL so the table doesn't grow forever.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - self.ttl,))
+
+    @contextmanager
+    def _connect(self):
+        # A fresh connection per call keeps the cache safe to use from
+        # the worker threads in run_email_automation.
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, task, body):
+        """
+        Builds the cache key for a model/task/prompt combination.
+        """
+        return hashlib.sha256(f"{model}|{task}|{body}".encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None if missing or expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_cache WHERE hash = ? AND ts >= ?",
+                (key, int(time.time()) - self.ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, task, response):
+        """
+        Stores (or refreshes) a response in the cache.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (hash, task, response, ts) VALUES (?, ?, ?, ?)",
+                (key, task, response, int(time.time())),
+            )
+
+    def get_or_compute(self, key, fn, task=None):
+        """
+        Returns the cached response for key, calling fn() and caching its
+        result on a miss. Empty results are not cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            print(f"⚡ LLM cache hit ({task or 'response'})")
+            return cached
+
+        response = fn()
+        if response is not None and str(response).strip():
+            response = str(response)
+            self.set(key, task, response)
+        return response
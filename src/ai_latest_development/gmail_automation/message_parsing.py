@@ -0,0 +1,97 @@
+"""
+message_parsing.py
+----------------
+Turns raw Gmail API message resources into plain sender/subject/body
+dicts. Kept free of Google client imports so it can be tested offline.
+"""
+
+import base64
+from collections import deque
+
+
+# HTML-to-text: prefer selectolax (lexbor, C) and fall back to BeautifulSoup.
+try:
+    from selectolax.parser import HTMLParser
+
+    def _html_to_text(html):
+        tree = HTMLParser(html)
+        tree.strip_tags(["script", "style"])
+        root = tree.body or tree.root
+        return root.text(separator="\n") if root is not None else ""
+
+except ImportError:
+    def _html_to_text(html):
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(html, "html.parser").get_text(separator="\n")
+
+
+def parse_payload(payload):
+    """
+    Decodes the plain-text and HTML bodies of a Gmail message payload
+    (supports multipart emails). Returns a (body, body_html) tuple.
+    """
+    b64decode = base64.urlsafe_b64decode
+
+    # Single-part message: the body is whatever the payload carries.
+    if "parts" not in payload:
+        data = payload.get("body", {}).get("data")
+        body = b64decode(data).decode("utf-8", errors="ignore") if data else ""
+        return body, ""
+
+    # Multipart: walk the MIME tree iteratively (depth-first, in document
+    # order) and collect raw bytes, decoding once at the end.
+    text_buf, html_buf = bytearray(), bytearray()
+    pending = deque(payload["parts"])
+    while pending:
+        part = pending.popleft()
+        data = part.get("body", {}).get("data")
+        if data:
+            mime_type = part.get("mimeType", "")
+            if mime_type == "text/plain":
+                text_buf += b64decode(data)
+            elif mime_type == "text/html":
+                html_buf += b64decode(data)
+        subparts = part.get("parts")
+        if subparts:
+            pending.extendleft(reversed(subparts))
+
+    return text_buf.decode("utf-8", errors="ignore"), html_buf.decode("utf-8", errors="ignore")
+
+
+def parse_headers(headers):
+    """
+    Picks the sender, subject and bulk-mail markers out of a header list.
+    """
+    # One pass over the headers; names are case-insensitive per RFC 5322.
+    # Keep the first occurrence of each, as the old per-header lookups did.
+    hmap = {}
+    for h in headers:
+        hmap.setdefault(h["name"].lower(), h["value"])
+
+    return {
+        "sender": hmap.get("from", "Unknown"),
+        "subject": hmap.get("subject", "No Subject"),
+        # Bulk-mail markers, used to skip the LLM for newsletters and the like
+        "list_unsubscribe": hmap.get("list-unsubscribe"),
+        "precedence": hmap.get("precedence"),
+    }
+
+
+def parse_message(message):
+    """
+    Turns a raw Gmail API message resource into a sender/subject/body dict.
+    """
+    payload = message.get("payload", {})
+    parsed = parse_headers(payload.get("headers", []))
+    parsed["id"] = message.get("id")
+
+    body, body_html = parse_payload(payload)
+
+    # If plain text is empty, extract text from HTML
+    if not body and body_html:
+        body = _html_to_text(body_html)
+
+    parsed["body"] = body.strip()
+    parsed["body_html"] = body_html.strip()
+    return parsed
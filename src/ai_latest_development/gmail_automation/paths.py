@@ -0,0 +1,34 @@
+"""
+paths.py
+----------------
+Where runtime caches live. They hold email summaries, drafts and a
+downloaded model, so they go in the user's cache directory rather than
+the package source tree. Override with GMAIL_AUTOMATION_CACHE_DIR.
+"""
+
+import os
+
+
+def _default_cache_dir():
+    if os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ai_latest_development")
+
+
+def cache_dir():
+    """
+    Returns the cache directory, reading GMAIL_AUTOMATION_CACHE_DIR on each
+    call so it can be set after import (e.g. by load_dotenv or a test).
+    """
+    return os.getenv("GMAIL_AUTOMATION_CACHE_DIR") or _default_cache_dir()
+
+
+def cache_path(name):
+    """
+    Returns the path for a cache file or folder, creating cache_dir() if needed.
+    """
+    directory = cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
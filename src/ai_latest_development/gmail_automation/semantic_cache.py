@@ -0,0 +1,192 @@
+"""
+semantic_cache.py
+----------------
+Similarity-based cache for draft replies. Incoming emails are embedded
+with a sentence-transformers model and looked up in a FAISS index, so
+paraphrases of an email we've already answered reuse the earlier draft,
+as long as it came from the same sender and got the same decision.
+
+Embeddings come from an int8-quantized ONNX export of the model when
+optimum/onnxruntime are installed (a fraction of the memory of float32
+PyTorch, and faster on CPU), falling back to sentence-transformers.
+
+Requires the optional ``semantic`` extras (faiss-cpu plus optimum[onnxruntime]
+or sentence-transformers).
+"""
+
+import os
+import json
+import platform
+import threading
+from email.utils import parseaddr
+
+from ai_latest_development.gmail_automation.paths import cache_path
+
+# Optional dependencies
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+# Created in the user cache directory (see paths.py) unless paths are given.
+DEFAULT_INDEX_FILE = "semantic_cache.faiss"
+DEFAULT_ONNX_DIR = "onnx_int8"
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_THRESHOLD = 0.92
+
+# all-MiniLM-L6-v2 was trained on sequences up to this length.
+MAX_SEQ_LENGTH = 256
+
+QUANTIZED_FILE = "model_quantized.onnx"
+
+# Neighbours to scan for an entry with a matching decision/sender.
+SEARCH_K = 5
+
+
+def _entry_key(decision, sender):
+    """
+    Normalizes the (decision, sender) pair a cached draft is only reused for.
+    """
+    address = parseaddr(sender or "")[1] or (sender or "")
+    return (str(decision or "").strip().lower(), address.strip().lower())
+
+
+def _load_onnx_int8(model_name, onnx_dir):
+    """
+    Returns (tokenizer, model) for an int8 dynamically-quantized ONNX export
+    of model_name, exporting and quantizing it into onnx_dir on first use.
+    """
+    if not os.path.exists(os.path.join(onnx_dir, QUANTIZED_FILE)):
+        print("⏳ Exporting embedding model to int8 ONNX (first run only)...")
+        model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name, export=True, provider="CPUExecutionProvider"
+        )
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(model).quantize(save_dir=onnx_dir, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(onnx_dir)
+
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        onnx_dir, file_name=QUANTIZED_FILE, provider="CPUExecutionProvider"
+    )
+    return AutoTokenizer.from_pretrained(onnx_dir), model
+
+
+class SemanticCache:
+    def __init__(self, index_path=None, threshold=DEFAULT_THRESHOLD,
+                 model_name=DEFAULT_MODEL, onnx_dir=None):
+        """
+        Initialize the cache, loading a previously saved index if present.
+        """
+        if faiss is None or (ORTModelForFeatureExtraction is None and SentenceTransformer is None):
+            raise ImportError(
+                "SemanticCache needs faiss-cpu and optimum[onnxruntime] or sentence-transformers "
+                "(pip install 'ai-latest-development[semantic]')."
+            )
+
+        self.index_path = index_path or cache_path(DEFAULT_INDEX_FILE)
+        self.responses_path = os.path.splitext(self.index_path)[0] + ".json"
+        self.threshold = threshold
+        self.model_name = model_name
+        self.onnx_dir = onnx_dir or cache_path(DEFAULT_ONNX_DIR)
+        self._model = None
+        self._tokenizer = None
+        # Drafts may be generated from several threads at once.
+        self._lock = threading.Lock()
+
+        self.index = None
+        self.entries = []
+        if os.path.exists(self.index_path) and os.path.exists(self.responses_path):
+            index = faiss.read_index(self.index_path)
+            with open(self.responses_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            # A crash between the two writes in add() can leave them out of
+            # step; row ids would then point at the wrong drafts, so start over.
+            if index.ntotal == len(entries):
+                self.index, self.entries = index, entries
+            else:
+                print("⚠️ Semantic cache index and drafts are out of sync; starting a fresh cache.")
+
+    def _embed(self, text):
+        # Loading the model is slow, so only do it once we actually need it.
+        if self._model is None:
+            if ORTModelForFeatureExtraction is not None:
+                self._tokenizer, self._model = _load_onnx_int8(self.model_name, self.onnx_dir)
+            else:
+                self._model = SentenceTransformer(self.model_name)
+
+        if self._tokenizer is None:
+            vector = self._model.encode([text], normalize_embeddings=True)
+            return np.asarray(vector, dtype="float32")
+
+        # Same pooling as the sentence-transformers model: masked mean, then L2.
+        inputs = self._tokenizer(
+            [text], padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors="np"
+        )
+        hidden = np.asarray(self._model(**inputs).last_hidden_state, dtype="float32")
+        mask = inputs["attention_mask"][..., None].astype("float32")
+        vector = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return vector / np.linalg.norm(vector, axis=1, keepdims=True)
+
+    def lookup(self, text, decision=None, sender=None):
+        """
+        Returns the cached response for the most similar text stored with the
+        same decision and sender, or None if nothing scores at or above the
+        similarity threshold.
+        """
+        key = _entry_key(decision, sender)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            k = min(SEARCH_K, self.index.ntotal)
+            scores, ids = self.index.search(self._embed(text), k)
+
+            for score, idx in zip(scores[0], ids[0]):
+                score, idx = float(score), int(idx)
+                if idx < 0 or score < self.threshold:
+                    break  # results are sorted, nothing better follows
+                entry = self.entries[idx] if idx < len(self.entries) else None
+                if isinstance(entry, dict) and _entry_key(entry.get("decision"), entry.get("sender")) == key:
+                    print(f"🧠 Semantic cache hit (similarity {score:.2f})")
+                    return entry["response"]
+        return None
+
+    def add(self, text, response, decision=None, sender=None):
+        """
+        Stores a response for text (tagged with its decision and sender) and
+        persists the index to disk.
+        """
+        decision, sender = _entry_key(decision, sender)
+        with self._lock:
+            vector = self._embed(text)
+            if self.index is None:
+                # Embeddings are normalized, so inner product == cosine similarity.
+                self.index = faiss.IndexFlatIP(vector.shape[1])
+            self.index.add(vector)
+            self.entries.append({"response": response, "decision": decision, "sender": sender})
+
+            # Write both files via temp + rename so a crash can't leave half a file.
+            tmp_index = self.index_path + ".tmp"
+            faiss.write_index(self.index, tmp_index)
+            tmp_entries = self.responses_path + ".tmp"
+            with open(tmp_entries, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_index, self.index_path)
+            os.replace(tmp_entries, self.responses_path)
@@ -0,0 +1,51 @@
+"""
+triage.py
+----------------
+Cheap, LLM-free helpers for triaging emails: the no-reply heuristics,
+decision-label normalization and parsing of batch triage replies.
+"""
+
+import re
+import json
+
+from ai_latest_development.gmail_automation.prompts import DECISION_LABELS
+
+# No-reply heuristics (skip the LLM for obvious bulk mail)
+NO_REPLY_SENDER_RE = re.compile(r"no-?reply@|newsletter@|notifications?@", re.I)
+NO_REPLY_SUBJECT_RE = re.compile(r"receipt|order confirmed|unsubscribe", re.I)
+BULK_PRECEDENCE = {"bulk", "list", "junk"}
+
+
+def is_likely_no_reply(email_data):
+    """Cheap pre-check for emails that clearly don't need a reply."""
+    if email_data.get("list_unsubscribe"):
+        return True
+    if (email_data.get("precedence") or "").strip().lower() in BULK_PRECEDENCE:
+        return True
+    if NO_REPLY_SENDER_RE.search(email_data.get("sender") or ""):
+        return True
+    return bool(NO_REPLY_SUBJECT_RE.search(email_data.get("subject") or ""))
+
+
+def normalize_decision(raw):
+    """Map the decider's label (or stray wording) onto DECISION_LABELS values."""
+    text = str(raw or "").strip().strip("\"'`.").lower()
+    for label, decision in DECISION_LABELS.items():
+        if label in text or decision in text:
+            return decision
+    return text or None
+
+
+def parse_json_array(raw):
+    """
+    Extract the JSON array from an LLM reply (tolerating text around it).
+    Raises ValueError if there isn't a valid one.
+    """
+    raw = str(raw or "")
+    start, end = raw.find("["), raw.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError(f"Batch triage did not return a JSON array: {raw[:200]!r}")
+    results = json.loads(raw[start:end + 1])  # JSONDecodeError is a ValueError
+    if not isinstance(results, list):
+        raise ValueError(f"Batch triage did not return a JSON array: {raw[:200]!r}")
+    return results
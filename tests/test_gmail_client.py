@@ -0,0 +1,162 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+HAS_GOOGLE_CLIENT = all(
+    importlib.util.find_spec(m) for m in ("googleapiclient", "google_auth_httplib2", "google_auth_oauthlib")
+)
+
+if HAS_GOOGLE_CLIENT:
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    from ai_latest_development.gmail_automation import gmail_client
+    from ai_latest_development.gmail_automation.gmail_client import GmailClient
+
+
+def _message(msg_id):
+    return {"id": msg_id, "payload": {"headers": [{"name": "Subject", "value": msg_id}]}}
+
+
+def _http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+
+class FakeRequest:
+    def __init__(self, service, msg_id):
+        self.service, self.msg_id = service, msg_id
+
+    def execute(self, http=None, num_retries=0):
+        return self.service.single(self.msg_id)
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service, self.callback, self.items = service, callback, []
+
+    def add(self, request, request_id):
+        self.items.append(request_id)
+
+    def execute(self):
+        self.service.batches.append(list(self.items))
+        if self.service.batch_error is not None:
+            raise self.service.batch_error
+        for msg_id in self.items:
+            response, exception = self.service.respond(msg_id)
+            self.callback(msg_id, response, exception)
+
+
+class FakeService:
+    """
+    Stands in for the Gmail API resource. respond(msg_id) decides what the
+    batch endpoint returns for each item; single(msg_id) serves .get() calls.
+    """
+
+    def __init__(self, respond=None, batch_error=None):
+        self.respond = respond or (lambda msg_id: (_message(msg_id), None))
+        self.batch_error = batch_error
+        self.batches = []
+        self.singles = []
+
+    def single(self, msg_id):
+        self.singles.append(msg_id)
+        return _message(msg_id)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, format, **kwargs):
+        return FakeRequest(self, id)
+
+
+@unittest.skipUnless(HAS_GOOGLE_CLIENT, "needs google-api-python-client")
+class BatchReadMessagesTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(gmail_client.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, service):
+        client = GmailClient()
+        client._service = service
+        return client
+
+    def test_chunks_and_keeps_order(self):
+        service = FakeService()
+        ids = [f"m{i}" for i in range(120)]
+        results = self._client(service).batch_read_messages(ids)
+
+        self.assertEqual([len(b) for b in service.batches], [50, 50, 20])
+        self.assertEqual([r["id"] for r in results], ids)
+
+    def test_rate_limited_items_are_retried(self):
+        limited = {"m1"}
+
+        def respond(msg_id):
+            if msg_id in limited:
+                limited.discard(msg_id)
+                return None, _http_error(429)
+            if msg_id == "m2":
+                return None, _http_error(404)
+            return _message(msg_id), None
+
+        service = FakeService(respond)
+        results = self._client(service).batch_read_messages(["m0", "m1", "m2", "m3"])
+
+        self.assertEqual(service.batches, [["m0", "m1", "m2", "m3"], ["m1"]])
+        self.assertEqual([r["id"] for r in results], ["m0", "m1", "m3"])
+        self.sleep.assert_called_once()
+
+    def test_persistent_rate_limit_falls_back_to_single_gets(self):
+        service = FakeService(lambda msg_id: (None, _http_error(429)))
+        results = self._client(service).batch_read_messages(["m0", "m1"])
+
+        self.assertEqual(len(service.batches), gmail_client.MAX_RETRIES + 1)
+        self.assertEqual(sorted(service.singles), ["m0", "m1"])
+        self.assertEqual([r["id"] for r in results], ["m0", "m1"])
+
+    def test_transport_error_falls_back_to_single_gets(self):
+        for error in (TimeoutError("timed out"), ConnectionResetError(), httplib2.ServerNotFoundError("dns")):
+            with self.subTest(error=type(error).__name__):
+                service = FakeService(batch_error=error)
+                results = self._client(service).batch_read_messages(["m0", "m1"])
+
+                self.assertEqual(sorted(service.singles), ["m0", "m1"])
+                self.assertEqual([r["id"] for r in results], ["m0", "m1"])
+
+    def test_malformed_message_is_skipped(self):
+        service = FakeService(lambda msg_id: (None if msg_id == "bad" else _message(msg_id), None))
+        results = self._client(service).batch_read_messages(["m0", "bad", "m1"])
+
+        self.assertEqual([r["id"] for r in results], ["m0", "m1"])
+
+
+@unittest.skipUnless(HAS_GOOGLE_CLIENT, "needs google-api-python-client")
+class LoadCredentialsTest(unittest.TestCase):
+    def test_refreshed_token_replaces_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            token_path = os.path.join(tmp, "token.json")
+            with open(token_path, "w") as f:
+                f.write('{"old": true}')
+
+            creds = mock.Mock(valid=False, expired=True, refresh_token="r")
+            creds.to_json.return_value = '{"new": true}'
+            with mock.patch.object(gmail_client.Credentials, "from_authorized_user_file", return_value=creds):
+                self.assertIs(gmail_client._load_credentials("unused", token_path), creds)
+
+            creds.refresh.assert_called_once()
+            with open(token_path) as f:
+                self.assertEqual(f.read(), '{"new": true}')
+            self.assertEqual(os.listdir(tmp), ["token.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
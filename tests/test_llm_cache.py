@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from ai_latest_development.gmail_automation.llm_cache import LLMCache
+
+
+class LLMCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "cache.sqlite3")
+
+    def _age(self, key, seconds):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("UPDATE llm_cache SET ts = ? WHERE hash = ?", (int(time.time()) - seconds, key))
+        conn.close()
+
+    def test_round_trip(self):
+        cache = LLMCache(self.path)
+        key = LLMCache.make_key("model", "read", "body")
+        cache.set(key, "read", "summary")
+        self.assertEqual(cache.get(key), "summary")
+
+    def test_expired_entries_are_ignored_and_pruned(self):
+        cache = LLMCache(self.path, ttl=60)
+        cache.set("old", "read", "stale")
+        self._age("old", 120)
+        self.assertIsNone(cache.get("old"))
+
+        LLMCache(self.path, ttl=60)  # prunes on init
+        with sqlite3.connect(self.path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, 0)
+
+    def test_get_or_compute_skips_empty_results(self):
+        cache = LLMCache(self.path)
+        self.assertEqual(cache.get_or_compute("k", lambda: "  "), "  ")
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.get_or_compute("k", lambda: "answer"), "answer")
+        self.assertEqual(cache.get_or_compute("k", lambda: "other"), "answer")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import base64
+import importlib.util
+import unittest
+
+from ai_latest_development.gmail_automation.message_parsing import (
+    parse_headers,
+    parse_message,
+    parse_payload,
+)
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def _part(mime_type, text=None, parts=None):
+    part = {"mimeType": mime_type, "body": {"data": _b64(text)} if text else {}}
+    if parts:
+        part["parts"] = parts
+    return part
+
+
+class ParsePayloadTest(unittest.TestCase):
+    def test_single_part_body(self):
+        self.assertEqual(parse_payload({"body": {"data": _b64("hello")}}), ("hello", ""))
+
+    def test_nested_parts_keep_document_order(self):
+        payload = {"parts": [
+            _part("multipart/alternative", parts=[
+                _part("text/plain", "A"),
+                _part("text/html", "<p>1</p>"),
+            ]),
+            _part("text/plain", "B"),
+            _part("text/html", "<p>2</p>"),
+        ]}
+        self.assertEqual(parse_payload(payload), ("AB", "<p>1</p><p>2</p>"))
+
+
+class ParseHeadersTest(unittest.TestCase):
+    def test_first_occurrence_wins_case_insensitively(self):
+        parsed = parse_headers([
+            {"name": "FROM", "value": "first@example.com"},
+            {"name": "from", "value": "second@example.com"},
+            {"name": "list-unsubscribe", "value": "<mailto:u@example.com>"},
+        ])
+        self.assertEqual(parsed["sender"], "first@example.com")
+        self.assertEqual(parsed["list_unsubscribe"], "<mailto:u@example.com>")
+
+    def test_defaults(self):
+        parsed = parse_headers([])
+        self.assertEqual(parsed["sender"], "Unknown")
+        self.assertEqual(parsed["subject"], "No Subject")
+        self.assertIsNone(parsed["precedence"])
+
+
+HAS_HTML_PARSER = any(importlib.util.find_spec(m) for m in ("selectolax", "bs4"))
+
+
+class ParseMessageTest(unittest.TestCase):
+    @unittest.skipUnless(HAS_HTML_PARSER, "needs selectolax or beautifulsoup4")
+    def test_falls_back_to_html_text(self):
+        message = {"id": "m1", "payload": {
+            "headers": [{"name": "Subject", "value": "Hi"}],
+            "parts": [_part("text/html", "<html><body><p>Hello</p></body></html>")],
+        }}
+        parsed = parse_message(message)
+        self.assertEqual(parsed["id"], "m1")
+        self.assertEqual(parsed["subject"], "Hi")
+        self.assertEqual(parsed["body"], "Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
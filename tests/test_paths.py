@@ -0,0 +1,21 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ai_latest_development.gmail_automation.paths import cache_path
+
+
+class CachePathTest(unittest.TestCase):
+    def test_env_override_is_read_at_call_time(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, "caches")
+            with mock.patch.dict(os.environ, {"GMAIL_AUTOMATION_CACHE_DIR": target}):
+                path = cache_path("llm_cache.sqlite3")
+
+            self.assertEqual(path, os.path.join(target, "llm_cache.sqlite3"))
+            self.assertTrue(os.path.isdir(target))
+
+
+if __name__ == "__main__":
+    unittest.main()
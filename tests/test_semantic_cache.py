@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ai_latest_development.gmail_automation import semantic_cache
+from ai_latest_development.gmail_automation.semantic_cache import SemanticCache
+
+HAS_FAISS = importlib.util.find_spec("faiss") is not None
+
+# Fixed embeddings instead of a real model: "refund" and "refund please"
+# are near-duplicates, "meeting" is unrelated.
+VECTORS = {
+    "refund": [1.0, 0.0, 0.0],
+    "refund please": [0.99, 0.141, 0.0],
+    "meeting": [0.0, 0.0, 1.0],
+}
+
+
+def _fake_embed(self, text):
+    import numpy as np
+
+    vector = np.asarray([VECTORS[text]], dtype="float32")
+    return vector / np.linalg.norm(vector, axis=1, keepdims=True)
+
+
+@unittest.skipUnless(HAS_FAISS, "needs faiss-cpu")
+class SemanticCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.index_path = os.path.join(tmp.name, "cache.faiss")
+
+        # No model is loaded: _embed is stubbed, so any embedder "is installed".
+        for patcher in (
+            mock.patch.object(SemanticCache, "_embed", _fake_embed),
+            mock.patch.object(semantic_cache, "SentenceTransformer", object),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _cache(self, **kwargs):
+        return SemanticCache(index_path=self.index_path, onnx_dir=self.dir, **kwargs)
+
+    def test_round_trip_and_reload(self):
+        cache = self._cache()
+        cache.add("refund", "Sorry, refunding now.", decision="follow-up", sender="Ana <ana@example.com>")
+        self.assertEqual(
+            cache.lookup("refund please", decision="follow-up", sender="Ana <ana@example.com>"),
+            "Sorry, refunding now.",
+        )
+        self.assertIsNone(cache.lookup("meeting", decision="follow-up", sender="ana@example.com"))
+
+        reloaded = self._cache()
+        self.assertEqual(reloaded.index.ntotal, 1)
+        self.assertEqual(
+            reloaded.lookup("refund", decision="follow-up", sender="ana@example.com"),
+            "Sorry, refunding now.",
+        )
+
+    def test_hits_are_scoped_by_decision_and_sender(self):
+        cache = self._cache()
+        cache.add("refund", "Draft for Ana", decision="follow-up", sender="ana@example.com")
+        cache.add("refund", "Thanks Ben", decision="thank you", sender="ben@example.com")
+
+        self.assertEqual(cache.lookup("refund", decision="Follow-Up", sender="ANA@example.com"), "Draft for Ana")
+        self.assertEqual(cache.lookup("refund", decision="thank you", sender="Ben <ben@example.com>"), "Thanks Ben")
+        self.assertIsNone(cache.lookup("refund", decision="thank you", sender="ana@example.com"))
+        self.assertIsNone(cache.lookup("refund", decision="follow-up", sender="carl@example.com"))
+
+    def test_out_of_sync_files_start_a_fresh_cache(self):
+        cache = self._cache()
+        cache.add("refund", "Draft", decision="follow-up", sender="ana@example.com")
+        with open(cache.responses_path, "w", encoding="utf-8") as f:
+            json.dump([], f)
+
+        fresh = self._cache()
+        self.assertIsNone(fresh.index)
+        self.assertEqual(fresh.entries, [])
+        self.assertIsNone(fresh.lookup("refund", decision="follow-up", sender="ana@example.com"))
+
+    def test_default_paths(self):
+        with mock.patch.object(semantic_cache, "cache_path", lambda name: os.path.join(self.dir, name)):
+            cache = SemanticCache()
+        self.assertEqual(cache.index_path, os.path.join(self.dir, "semantic_cache.faiss"))
+        self.assertEqual(cache.responses_path, os.path.join(self.dir, "semantic_cache.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from ai_latest_development.gmail_automation.triage import (
+    is_likely_no_reply,
+    normalize_decision,
+    parse_json_array,
+)
+
+
+class NoReplyHeuristicsTest(unittest.TestCase):
+    def test_bulk_markers(self):
+        self.assertTrue(is_likely_no_reply({"list_unsubscribe": "<mailto:u@example.com>"}))
+        self.assertTrue(is_likely_no_reply({"precedence": " Bulk "}))
+        self.assertTrue(is_likely_no_reply({"sender": "Shop <no-reply@shop.example>"}))
+        self.assertTrue(is_likely_no_reply({"subject": "Your receipt from Example"}))
+
+    def test_personal_mail(self):
+        email = {"sender": "Priya <priya@example.com>", "subject": "Q3 figures", "precedence": None}
+        self.assertFalse(is_likely_no_reply(email))
+
+
+class NormalizeDecisionTest(unittest.TestCase):
+    def test_labels_map_to_decisions(self):
+        self.assertEqual(normalize_decision("thank-you"), "thank you")
+        self.assertEqual(normalize_decision('"No-Reply-Needed."'), "no reply needed")
+        self.assertEqual(normalize_decision("information request"), "information request")
+
+    def test_unknown_and_empty(self):
+        self.assertEqual(normalize_decision("Maybe"), "maybe")
+        self.assertIsNone(normalize_decision(""))
+        self.assertIsNone(normalize_decision(None))
+
+
+class ParseJsonArrayTest(unittest.TestCase):
+    def test_tolerates_surrounding_text(self):
+        raw = 'Here you go: [{"id": "1", "decision": "follow-up"}] Done.'
+        self.assertEqual(parse_json_array(raw), [{"id": "1", "decision": "follow-up"}])
+
+    def test_rejects_missing_or_invalid_array(self):
+        for raw in ("no json here", "[not json]", "", None):
+            with self.assertRaises(ValueError):
+                parse_json_array(raw)
+
+
+if __name__ == "__main__":
+    unittest.main()